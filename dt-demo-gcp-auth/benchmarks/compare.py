@@ -0,0 +1,62 @@
+"""Compare microbenchmark results against a saved baseline.
+
+Both the baseline and the candidate are sets of `pytest --benchmark-json` files from repeated runs.
+For each benchmark, the best (lowest) `min` time across the runs is compared, which is far less
+sensitive to noise from other processes than the mean or a single run.  Exits with status 1 if any
+benchmark is slower than its baseline by more than the threshold.
+
+Used by `scripts/bench_auth.sh`.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+
+def best_of(directory: str) -> dict[str, float]:
+    """Return the lowest `min` time of each benchmark over the JSON result files in `directory`."""
+    best: dict[str, float] = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            for bench in json.load(f)["benchmarks"]:
+                name = bench["fullname"].split("::")[-1]
+                best[name] = min(best.get(name, float("inf")), bench["stats"]["min"])
+    return best
+
+
+def main():
+    """Compare the candidate results with the baseline and print a summary table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", help="Directory of baseline JSON results")
+    parser.add_argument("candidate", help="Directory of candidate JSON results")
+    parser.add_argument("--threshold", type=float, default=30.0, help="Maximum slowdown (%%)")
+    args = parser.parse_args()
+
+    baseline = best_of(args.baseline)
+    candidate = best_of(args.candidate)
+    if not baseline or not candidate:
+        print("❌ No benchmark results found.")
+        sys.exit(1)
+
+    regressed = []
+    print(f"{'Benchmark':<48} {'Baseline (µs)':>14} {'Now (µs)':>14} {'Change':>8}")
+    for name, now in sorted(candidate.items()):
+        if name not in baseline:
+            print(f"{name:<48} {'(new)':>14} {now * 1e6:>14.2f}")
+            continue
+        change = (now / baseline[name] - 1) * 100
+        flag = " ❌" if change > args.threshold else ""
+        print(f"{name:<48} {baseline[name] * 1e6:>14.2f} {now * 1e6:>14.2f} {change:>+7.1f}%{flag}")
+        if change > args.threshold:
+            regressed.append(name)
+
+    if regressed:
+        print(f"❌ {len(regressed)} benchmark(s) regressed by more than {args.threshold:g}%.")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.threshold:g}%.")
+
+
+if __name__ == "__main__":
+    main()
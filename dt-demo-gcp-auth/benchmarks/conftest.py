@@ -0,0 +1,22 @@
+"""Shared setup for the auth microbenchmarks.
+
+The benchmarks need neither Postgres nor network access: dummy settings are supplied here, before
+`dt_demo_gcp.auth` is first imported (importing it constructs `Settings` and the database engine,
+but does not connect).
+"""
+
+import os
+import secrets
+
+BENCH_ENV = {
+    "DB_USER": "bench",
+    "DB_USER_PASSWORD": "bench",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "auth",
+    "TOKEN_URL": "http://localhost:8000/token",
+    "JWT_SECRET_KEY": secrets.token_urlsafe(48),
+}
+
+for _key, _value in BENCH_ENV.items():
+    os.environ.setdefault(_key, _value)
@@ -0,0 +1,111 @@
+"""Microbenchmarks for the building blocks of `dt_demo_gcp.auth`.
+
+Run with `git script bench_auth` (see `scripts/bench_auth.sh`), which compares the results against
+a saved baseline and fails if any primitive regresses beyond a threshold.
+"""
+
+import asyncio
+from time import time
+from uuid import uuid4
+
+import bcrypt
+import pytest
+from jose import jwt
+from jose.constants import ALGORITHMS
+
+from dt_demo_gcp.auth.auth import JWTUser, decode_jwt_token
+from dt_demo_gcp.auth.config import Settings, settings
+
+from dt_demo_gcp.auth.models import User, UserCreate
+
+# bcrypt.gensalt() default, as used by `dt-demo-gcp-auth/update_user.sh` to hash passwords
+BCRYPT_ROUNDS = 12
+PASSWORD = "correct horse battery staple"
+
+
+def claims(exp_offset: int = 60 * 60 * 24) -> dict:
+    """JWT claims as issued by `authenticate_user()`, expiring `exp_offset` seconds from now."""
+    now = int(time())
+    return {"iss": "dt-demo-gcp", "sub": str(uuid4()), "iat": now, "exp": now + exp_offset}
+
+
+def new_token() -> str:
+    """Create a JWT as `authenticate_user()` does."""
+    return JWTUser.new_token(
+        claims=claims(), key=settings.jwt_secret_key, algorithm=ALGORITHMS.HS256
+    )
+
+
+@pytest.fixture(scope="module")
+def loop():
+    """Event loop for running the async primitives."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_new_token(benchmark):
+    """Issue a JWT.  Only `JWTUser.new_token()` is timed; the claims are built beforehand."""
+    benchmark(
+        JWTUser.new_token,
+        claims=claims(),
+        key=settings.jwt_secret_key,
+        algorithm=ALGORITHMS.HS256,
+    )
+
+
+@pytest.mark.parametrize(
+    "kind, error",
+    [
+        ("valid", None),
+        ("expired", "expired_token"),
+        ("tampered", "jwt_error"),
+    ],
+)
+def test_decode_jwt_token(benchmark, loop, kind, error):
+    """Decode a valid, expired or tampered (signed with another key) JWT."""
+    if kind == "expired":
+        # `JWTUser.new_token()` refuses to create expired tokens, so encode directly
+        token = jwt.encode(claims(exp_offset=-60), settings.jwt_secret_key, ALGORITHMS.HS256)
+    elif kind == "tampered":
+        token = jwt.encode(claims(), "not-" + settings.jwt_secret_key, ALGORITHMS.HS256)
+    else:
+        token = new_token()
+
+    def decode():
+        try:
+            return loop.run_until_complete(decode_jwt_token(token))
+        except ValueError as e:
+            return str(e)
+
+    result = benchmark(decode)
+    if error is None:
+        assert isinstance(result, JWTUser)
+    else:
+        assert result == error
+
+
+def test_bcrypt_checkpw(benchmark):
+    """Check a password against its bcrypt hash.  Slow by design, so use few benchmark rounds."""
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(BCRYPT_ROUNDS))
+    result = benchmark.pedantic(
+        bcrypt.checkpw, args=(PASSWORD.encode("utf-8"), hashed), rounds=5, iterations=1
+    )
+    assert result
+
+
+def test_user_validate(benchmark):
+    """Validate a `User` (as loaded from the database)."""
+    data = {"id": uuid4(), "username": "alice", "hashed_password": b"$2b$12$" + b"x" * 53}
+    benchmark(User.model_validate, data)
+
+
+def test_user_create_validate(benchmark):
+    """Validate a `UserCreate` request body."""
+    data = {"username": "alice", "password": PASSWORD}
+    benchmark(UserCreate.model_validate, data)
+
+
+def test_settings(benchmark):
+    """Construct `Settings` from the environment and `.env` file."""
+    benchmark(Settings)
@@ -0,0 +1,69 @@
+"""Benchmark: JWT vs opaque session token validation.
+
+Compares the per-request cost of `/validate` in each token mode, without a database: the opaque
+path is measured on an in-process table hit, which is the steady state for an active session.
+
+Run with: `uv run --package dt-demo-gcp-auth python dt-demo-gcp-auth/benchmarks/token_modes.py`
+"""
+
+import asyncio
+import os
+import secrets
+import timeit
+from time import time
+from uuid import uuid4
+
+# Dummy settings, so that no .env file or database is required
+os.environ.setdefault("DB_USER", "bench")
+os.environ.setdefault("DB_USER_PASSWORD", "bench")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "auth")
+os.environ.setdefault("TOKEN_URL", "http://localhost:8000/token")
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(48))
+
+from jose.constants import ALGORITHMS  # noqa: E402
+
+from dt_demo_gcp.auth import sessions  # noqa: E402
+from dt_demo_gcp.auth.auth import JWTUser, decode_token  # noqa: E402
+from dt_demo_gcp.auth.config import settings  # noqa: E402
+
+from dt_demo_gcp.auth.models import UserSession  # noqa: E402
+
+NUMBER = 10_000
+
+
+def main():
+    """Time token validation in both modes and print the results."""
+    loop = asyncio.new_event_loop()
+    user_id = uuid4()
+    now = int(time())
+    exp = now + 60 * 60 * 24
+
+    jwt_token = JWTUser.new_token(
+        claims={"iss": "dt-demo-gcp", "sub": str(user_id), "iat": now, "exp": exp},
+        key=settings.jwt_secret_key,
+        algorithm=ALGORITHMS.HS256,
+    )
+
+    opaque_token = secrets.token_urlsafe(16)
+    key = sessions._digest(opaque_token)
+    sessions._cache(key, UserSession(token_hash=key, user_id=user_id, iat=now, exp=exp))
+    settings.session_cache_ttl = float("inf")  # Never fall through to the (absent) database
+
+    tokens = {"jwt": jwt_token, "opaque": opaque_token}
+    results = {}
+    for mode, token in tokens.items():
+        settings.token_mode = mode
+        results[mode] = timeit.timeit(
+            lambda token=token: loop.run_until_complete(decode_token(None, token)), number=NUMBER
+        )
+
+    for mode, total in results.items():
+        per_call = total / NUMBER * 1e6
+        print(f"{mode:>8}: {per_call:8.2f} µs/validate, token {len(tokens[mode])} bytes")
+    print(f" speedup: {results['jwt'] / results['opaque']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
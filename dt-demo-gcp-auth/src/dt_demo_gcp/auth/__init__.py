@@ -1,18 +1,25 @@
 """Authentication module for the DT demo."""
 
+import hmac
 import sys
 from typing import Annotated
 
 import pydantic as pyd
-from fastapi import Cookie, Depends, FastAPI, HTTPException, cli, status
+from fastapi import Cookie, Depends, FastAPI, HTTPException, Response, cli, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing_extensions import Literal
 
-from dt_demo_gcp.auth.auth import JWTUser, LoginResponse, authenticate_user, decode_jwt_token
-from dt_demo_gcp.auth.db import get_session
+from dt_demo_gcp.auth.admission import AdmissionMiddleware, EndpointStats, admission
+from dt_demo_gcp.auth.auth import JWTUser, LoginResponse, authenticate_user, decode_token
+from dt_demo_gcp.auth.config import settings
+from dt_demo_gcp.auth.db import get_read_session, get_session
+from dt_demo_gcp.auth.profiling import ProfilingMiddleware
+from dt_demo_gcp.auth.profiling import router as profiling_router
+from dt_demo_gcp.auth.sessions import revoke_session_token
 
 from .__version__ import __version__ as version
 
@@ -42,6 +49,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Profiling is only installed when enabled, so that it costs nothing otherwise
+if settings.profile_secret_key is not None or settings.profile_requests:
+    app.add_middleware(ProfilingMiddleware)
+if settings.profile_secret_key is not None:
+    app.include_router(profiling_router)
+# Added last, so that it is the outermost middleware and shed requests do no further work
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    paths={"/validate": "validate", "/token": "token"},
+)
 
 
 class Message(pyd.BaseModel):
@@ -74,43 +92,74 @@ async def health() -> str:
     return "OK"
 
 
+async def admission_stats(
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(HTTPBearer(auto_error=False))
+    ],
+) -> dict[str, EndpointStats]:
+    """Admission control statistics for `/validate` and `/token`, incl. queue and shed counts.
+
+    Requires an `Authorization: Bearer <ADMISSION_STATS_KEY>` header, so that it can be polled by
+    monitoring.
+    """
+    if credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode("utf-8"), settings.admission_stats_key.encode("utf-8")
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid credentials")
+    return admission.stats
+
+
+# Only served if a key is configured
+if settings.admission_stats_key is not None:
+    app.add_api_route(
+        "/admin/admission", admission_stats, summary="Admission statistics", tags=["admin"]
+    )
+
+
 @app.post(
     "/token",
     summary="Token",
     description="""\
-Obtain a JWT token for the user. See
+Obtain an access token (a JWT, or an opaque session token if `TOKEN_MODE=opaque`) for the user.
+See
 [RFC6749 Section 4.1.4](https://datatracker.ietf.org/doc/html/rfc6749#section-4.1.4).
 Note that we only use the `access_token` and `token_type` fields from the response specification.
 """,
     responses=examples(
         ("Invalid username or password", status.HTTP_401_UNAUTHORIZED, "plain"),
+        ("Service overloaded, please retry", status.HTTP_503_SERVICE_UNAVAILABLE, "plain"),
     ),
 )
 async def token(
     form: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
 ) -> LoginResponse:
     """Obtain a JWT token for the user, or raise 401 Unauthorized.
 
     Parameters:
         form: The OAuth2 password request form. Contains the username and password.
-        session: The database session.  The database contains a "user" table with user IDs (UUIDs),
-            usernames, and hashed passwords.
+        session: The database session on the primary, for writes (opaque sessions).
+        read_session: A database session for the user lookup: read-only on a replica if one is
+            available, otherwise `session`.  The database contains a "user" table with user IDs
+            (UUIDs), usernames, and hashed passwords.
     """
-    return await authenticate_user(session, form.username, form.password)
+    return await authenticate_user(session, form.username, form.password, read_session)
 
 
 @app.get(
     "/validate",
     summary="Token validation",
     description="""\
-Validate the JWT token; for Traefik's ForwardAuth middleware.
+Validate the access token; for Traefik's ForwardAuth middleware.
 
 If the token is valid, return a 200 OK response.
 If the token is missing or invalid, return a HTTP 303 response and redirect to the login page.
 Note that HTTP 303 is preferred over HTTP 302 or 307, as it explicitly indicates that the client
 should perform a GET request to the provided location.
 
+If the service is overloaded, return a HTTP 503 response with a `Retry-After` header.
+
 **TODO**: If the token is valid but the user is not authorized for a specific resource,
 return a 403 Forbidden response.
 """,
@@ -119,15 +168,15 @@ async def validate_token(
     session: AsyncSession = Depends(get_session),
     access_token: str | None = Cookie(default=None),
 ) -> JWTUser:
-    """Validate the JWT token."""
+    """Validate the access token."""
     if not access_token:
         raise HTTPException(
             status_code=status.HTTP_303_SEE_OTHER,
             headers={"Location": "/login/?error=missing_token"},
         )
     try:
-        claims = await decode_jwt_token(access_token)
-        print("Decoded JWT claims: ", claims)
+        claims = await decode_token(session, access_token)
+        print("Decoded token claims: ", claims)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_303_SEE_OTHER,
@@ -136,6 +185,28 @@ async def validate_token(
     return claims
 
 
+@app.post(
+    "/logout",
+    summary="Logout",
+    description="""\
+Revoke the current session and clear the `access_token` cookie.
+
+Revocation only applies to opaque session tokens (`TOKEN_MODE=opaque`); a JWT remains valid
+until it expires.
+""",
+)
+async def logout(
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    access_token: str | None = Cookie(default=None),
+) -> Message:
+    """Revoke the current session, if any, and clear the `access_token` cookie."""
+    if access_token and settings.token_mode == "opaque":
+        await revoke_session_token(session, access_token)
+    response.delete_cookie("access_token")
+    return Message(detail="Logged out")
+
+
 def main():
     """Launch FastAPI dev server.
 
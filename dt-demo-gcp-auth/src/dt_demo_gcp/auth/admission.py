@@ -0,0 +1,173 @@
+"""Priority admission control and load shedding.
+
+`/validate` (ForwardAuth for every service behind Traefik) and `/token` (logins) share the same
+event loop and database pool.  To stop a login surge from starving ForwardAuth checks, requests
+to these endpoints are admitted through a shared pool of `settings.admission_capacity` slots:
+
+- `/token` may hold at most `capacity - admission_validate_reserved` slots, so the reserved share
+  is always available to `/validate`.
+- Requests that cannot be admitted wait in a bounded per-endpoint queue.  When a slot is freed,
+  queued `/validate` requests are admitted before queued `/token` requests.
+- If the queue is full, or a request waits longer than `settings.admission_queue_timeout`, the
+  request is shed with HTTP 503 and a `Retry-After` header.
+"""
+
+import asyncio
+from collections import deque
+
+import pydantic as pyd
+from fastapi import status
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from dt_demo_gcp.auth.config import settings
+
+
+class LoadShedError(Exception):
+    """Raised when a request is shed by the admission controller."""
+
+
+class EndpointStats(pyd.BaseModel):
+    """Admission statistics for one endpoint.
+
+    Attributes:
+        limit: Maximum number of concurrent requests.
+        queue_size: Maximum number of queued requests.
+        in_flight: Number of requests currently being served.
+        queued: Number of requests currently waiting for a slot.
+        admitted: Total number of requests admitted.
+        shed: Total number of requests shed (queue full or wait timed out).
+    """
+
+    limit: int
+    queue_size: int
+    in_flight: int = 0
+    queued: int = 0
+    admitted: int = 0
+    shed: int = 0
+
+
+class AdmissionController:
+    """Admit requests to a shared pool of slots, in priority order of the given endpoints."""
+
+    def __init__(self, capacity: int, limits: dict[str, int], queue_sizes: dict[str, int]):
+        """Create the admission controller.
+
+        Parameters:
+            capacity: Total number of slots shared between all endpoints.
+            limits: Maximum number of slots per endpoint.  The iteration order of this dict is
+                the priority order in which queued requests are admitted.
+            queue_sizes: Maximum number of queued requests per endpoint.
+        """
+        self.capacity = capacity
+        self.in_flight = 0
+        self.stats = {
+            name: EndpointStats(limit=limit, queue_size=queue_sizes[name])
+            for name, limit in limits.items()
+        }
+        self._waiters: dict[str, deque[asyncio.Future]] = {name: deque() for name in limits}
+
+    def _can_admit(self, name: str) -> bool:
+        return self.in_flight < self.capacity and (
+            self.stats[name].in_flight < self.stats[name].limit
+        )
+
+    def _admit(self, name: str):
+        self.in_flight += 1
+        self.stats[name].in_flight += 1
+        self.stats[name].admitted += 1
+
+    async def acquire(self, name: str, timeout: float):
+        """Acquire a slot for the endpoint, or raise `LoadShedError`."""
+        stats = self.stats[name]
+        waiters = self._waiters[name]
+        if not waiters and self._can_admit(name):
+            self._admit(name)
+            return
+        if len(waiters) >= stats.queue_size:
+            stats.shed += 1
+            raise LoadShedError
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        stats.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as we gave up; hand the slot on
+                self.release(name)
+            else:
+                waiter.cancel()
+                waiters.remove(waiter)
+                stats.queued -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            stats.shed += 1
+            raise LoadShedError from e
+
+    def release(self, name: str):
+        """Release a slot for the endpoint and admit queued requests, highest priority first."""
+        self.in_flight -= 1
+        self.stats[name].in_flight -= 1
+        for other, waiters in self._waiters.items():
+            while waiters and self._can_admit(other):
+                waiter = waiters.popleft()
+                self.stats[other].queued -= 1
+                self._admit(other)
+                waiter.set_result(None)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an `AdmissionController` to requests, by endpoint path."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController, paths: dict[str, str]):
+        """Create the middleware.
+
+        Parameters:
+            app: The ASGI application to wrap.
+            controller: The admission controller.
+            paths: Mapping of request path to endpoint name in the controller.  Requests to
+                other paths are passed through.
+        """
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Admit the request, shed it with HTTP 503, or pass it through."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = self.paths.get(scope["path"].removeprefix(scope.get("root_path", "")))
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(name, settings.admission_queue_timeout)
+        except LoadShedError:
+            response = PlainTextResponse(
+                "Service overloaded, please retry",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.admission_retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+
+admission = AdmissionController(
+    capacity=settings.admission_capacity,
+    limits={
+        "validate": settings.admission_capacity,
+        "token": settings.admission_capacity - settings.admission_validate_reserved,
+    },
+    queue_sizes={
+        "validate": settings.admission_validate_queue,
+        "token": settings.admission_token_queue,
+    },
+)
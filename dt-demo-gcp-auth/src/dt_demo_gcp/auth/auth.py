@@ -1,5 +1,6 @@
 """JWT user authentication."""
 
+import asyncio
 from time import time
 from typing import Literal
 
@@ -13,6 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from dt_demo_gcp.auth.config import settings
+from dt_demo_gcp.auth.sessions import lookup_session_token, new_session_token
 
 from dt_demo_gcp.auth.models import User
 
@@ -33,16 +35,25 @@ class LoginResponse(BaseModel):
     token_type: Literal["bearer"] = "bearer"
 
 
-async def authenticate_user(session: AsyncSession, username: str, password: str) -> LoginResponse:
-    """Authenticate user and return JWT token."""
-    if settings.jwt_secret_key is None:
+async def authenticate_user(
+    session: AsyncSession,
+    username: str,
+    password: str,
+    read_session: AsyncSession | None = None,
+) -> LoginResponse:
+    """Authenticate user and return an access token (a JWT, or opaque if `settings.token_mode`).
+
+    The user is looked up using `read_session` (e.g. on a read replica) if given; `session` is
+    used for writes, i.e. creating opaque sessions.
+    """
+    if settings.token_mode == "jwt" and settings.jwt_secret_key is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="JWT secret key is not set."
         )
 
     # Check that the user exists
     user: User | None = (
-        await session.execute(select(User).where(User.username == username))
+        await (read_session or session).execute(select(User).where(User.username == username))
     ).scalar_one_or_none()
     if not user:
         print(f"User '{username}' not found.")
@@ -50,9 +61,10 @@ async def authenticate_user(session: AsyncSession, username: str, password: str)
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password"
         )
 
-    # Check the user's password against the stored hash
+    # Check the user's password against the stored hash.
+    # bcrypt is deliberately slow and releases the GIL, so run it off the event loop
     hash = user.hashed_password
-    success = bcrypt.checkpw(password.encode("utf-8"), hash)
+    success = await asyncio.to_thread(bcrypt.checkpw, password.encode("utf-8"), hash)
     if not success:
         print(f"Password for user '{username}' is incorrect, expected hash: {hash}.")
         raise HTTPException(
@@ -62,6 +74,9 @@ async def authenticate_user(session: AsyncSession, username: str, password: str)
     now = int(time())
     exp = now + 60 * 60 * 24  # Token expires in 24 hours
 
+    if settings.token_mode == "opaque":
+        return LoginResponse(access_token=await new_session_token(session, user.id, now, exp))
+
     token = JWTUser.new_token(
         claims={"iss": "dt-demo-gcp", "sub": str(user.id), "iat": now, "exp": exp},
         key=settings.jwt_secret_key,
@@ -84,3 +99,17 @@ async def decode_jwt_token(token: str) -> JWTUser:
         raise ValueError("jwt_error") from e
     except Exception as e:
         raise ValueError("unexpected_error") from e
+
+
+async def decode_token(session: AsyncSession, token: str) -> JWTUser:
+    """Decode an access token according to `settings.token_mode` and return the user claims.
+
+    Opaque tokens are looked up in the session store; the returned claims have the same shape as
+    those of a JWT, so `/validate` responds identically in either mode.
+    """
+    if settings.token_mode == "opaque":
+        record = await lookup_session_token(session, token)
+        return JWTUser.model_construct(
+            iss="dt-demo-gcp", sub=str(record.user_id), iat=record.iat, exp=record.exp
+        )
+    return await decode_jwt_token(token)
@@ -1,7 +1,9 @@
 """Configuration settings for the authentication service."""
 
+from typing import Literal, Self
+
 from dotenv import find_dotenv
-from pydantic import PostgresDsn, computed_field
+from pydantic import PostgresDsn, computed_field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,6 +15,17 @@ class Settings(BaseSettings):
     db_host: str
     db_port: int
     db_name: str
+    # SQLAlchemy connection pool for each engine (defaults as in SQLAlchemy).  The admission
+    # capacity below defaults to `db_pool_size + db_max_overflow`; tune them together.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+
+    # Read replicas, as full DSNs (a JSON list in the environment); see `dt_demo_gcp.auth.db`.
+    db_replica_urls: list[str] = []
+    # Seconds to skip a replica after it fails to connect.
+    db_replica_retry_after: float = 30.0
+    # Seconds to wait for a replica connection (new, or from the pool) before failing over.
+    db_replica_connect_timeout: float = 2.0
 
     token_url: str
 
@@ -20,6 +33,55 @@ class Settings(BaseSettings):
     # Perform check in `dt_demo_gcp.auth.authenticate_user()`
     jwt_secret_key: str | None = None
 
+    # Token format returned by `/token`.  "jwt" issues a signed JWT; "opaque" issues a random
+    # 128-bit session handle, looked up in `dt_demo_gcp.auth.sessions` (internal deployments only).
+    token_mode: Literal["jwt", "opaque"] = "jwt"
+
+    # Opaque mode: seconds an in-process session entry is trusted before re-checking the database,
+    # which bounds how long a revocation by another worker can go unnoticed.  Set to 0 for strict
+    # revocation, at the cost of a database lookup on every `/validate`.
+    session_cache_ttl: float = 5.0
+    # Opaque mode: maximum number of sessions held in the in-process table.
+    session_cache_size: int = 100_000
+    # Opaque mode: minimum seconds between purges of expired sessions from the database.
+    session_purge_interval: float = 60.0
+
+    # Admission control for `/validate` and `/token`; see `dt_demo_gcp.auth.admission`.
+    # Total concurrent requests, of which `admission_validate_reserved` are kept for `/validate`.
+    # The capacity defaults to the database pool size (`db_pool_size + db_max_overflow`), so that
+    # admitted logins cannot exhaust the pool, and the reserve to a third of the capacity.
+    admission_capacity: int | None = None
+    admission_validate_reserved: int | None = None
+    # Maximum number of requests waiting for a slot, per endpoint, and the maximum wait (seconds).
+    admission_validate_queue: int = 256
+    admission_token_queue: int = 32
+    admission_queue_timeout: float = 5.0
+    # Value of the `Retry-After` header (seconds) when a request is shed.
+    admission_retry_after: int = 1
+    # Bearer token for `GET /admin/admission` (statistics); the endpoint is disabled if unset.
+    admission_stats_key: str | None = None
+
+    # Profiling; see `dt_demo_gcp.auth.profiling`.  Disabled unless one of the first two is set.
+    # Key for signing `X-Profile-Signature` headers; also enables `GET /admin/profile`.
+    profile_secret_key: str | None = None
+    # Profile every request (debugging only).
+    profile_requests: bool = False
+    # Directory for per-request profiles.
+    profile_dir: str = "/tmp/dt-demo-gcp-auth/profiles"
+    # Maximum number of per-request profiles kept in `profile_dir`; the oldest are deleted.
+    profile_max_files: int = 100
+
+    @model_validator(mode="after")
+    def check_admission_reserve(self) -> Self:
+        """Derive default admission limits; ensure that `/token` is left at least one slot."""
+        if self.admission_capacity is None:
+            self.admission_capacity = self.db_pool_size + self.db_max_overflow
+        if self.admission_validate_reserved is None:
+            self.admission_validate_reserved = self.admission_capacity // 3
+        if not 0 <= self.admission_validate_reserved < self.admission_capacity:
+            raise ValueError("admission_validate_reserved must be in [0, admission_capacity).")
+        return self
+
     @computed_field
     @property
     def database_url(self) -> PostgresDsn:
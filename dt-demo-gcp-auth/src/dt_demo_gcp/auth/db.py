@@ -1,13 +1,29 @@
-"""Database session management."""
+"""Database session management.
 
+`get_session()` gives a session on the primary database, for writes and read-after-write.
+`get_read_session()` gives a session for lookups that can tolerate replication lag, routed to one
+of `settings.db_replica_urls` (round robin) in read-only transactions.  A replica that does not
+connect within `settings.db_replica_connect_timeout` seconds is skipped for
+`settings.db_replica_retry_after` seconds.  If no replica is available, the request's (writable)
+primary session from `get_session()` is reused, so that no extra primary connection is taken.
+"""
+
+import itertools
+from time import monotonic
 from typing import AsyncIterator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from fastapi import Depends
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from dt_demo_gcp.auth.config import settings
 
-engine = create_async_engine(str(settings.database_url))
+engine = create_async_engine(
+    str(settings.database_url),
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+)
 async_session_maker = sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -15,7 +31,83 @@ async_session_maker = sessionmaker(
 )
 
 
+class Replica:
+    """A read replica and its health.
+
+    Attributes:
+        engine: The engine for the replica.
+        session_maker: Session factory bound to `engine`.
+        down_until: `time.monotonic()` value until which the replica is considered unhealthy.
+    """
+
+    def __init__(self, url: str):
+        """Create the engine and session factory for the replica at `url`."""
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            # Fail over quickly if the replica stops answering, rather than after asyncpg's 60 s
+            pool_timeout=settings.db_replica_connect_timeout,
+            connect_args={"timeout": settings.db_replica_connect_timeout},
+            execution_options={"postgresql_readonly": True},
+        )
+        self.session_maker = sessionmaker(
+            bind=self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the replica is currently considered healthy."""
+        return monotonic() >= self.down_until
+
+    def mark_down(self):
+        """Mark the replica as unhealthy for `settings.db_replica_retry_after` seconds."""
+        self.down_until = monotonic() + settings.db_replica_retry_after
+
+
+replicas = [Replica(url) for url in settings.db_replica_urls]
+_replica_cycle = itertools.cycle(replicas)
+
+
 async def get_session() -> AsyncIterator[AsyncSession]:
-    """Get a database session."""
+    """Get a database session on the primary."""
     async with async_session_maker() as session:
         yield session
+
+
+async def get_read_session(
+    session: AsyncSession = Depends(get_session),
+) -> AsyncIterator[AsyncSession]:
+    """Get a read-only session on a healthy replica, or else the (writable) primary `session`.
+
+    FastAPI caches dependencies per request, so `session` is the same session that an endpoint
+    gets from `Depends(get_session)`; a separate connection is only opened for a replica.
+    """
+    for _ in range(len(replicas)):
+        replica = next(_replica_cycle)
+        if not replica.healthy:
+            continue
+        replica_session = replica.session_maker()
+        try:
+            # Connect now, so that an unreachable replica can be failed over
+            await replica_session.connection()
+        except (SQLAlchemyError, OSError) as e:  # incl. connect and pool timeouts
+            print(f"Replica {replica.engine.url!r} unavailable, failing over: {e}")
+            replica.mark_down()
+            await replica_session.close()
+            continue
+        try:
+            yield replica_session
+        except DBAPIError as e:
+            if e.connection_invalidated:
+                replica.mark_down()
+            raise
+        finally:
+            await replica_session.close()
+        return
+
+    yield session
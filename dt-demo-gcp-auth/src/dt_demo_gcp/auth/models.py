@@ -4,7 +4,7 @@ import copy
 from uuid import UUID, uuid4
 
 from pydantic.fields import FieldInfo
-from sqlalchemy import Column
+from sqlalchemy import Column, ForeignKey
 from sqlalchemy.dialects.postgresql import BYTEA
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.dialects.postgresql import VARCHAR
@@ -85,3 +85,27 @@ class UserUpdate(SQLModel):
     password: str = PlaintextPasswordField  # Current password mandatory
     new_username: str | None = UserNameOptionalField
     new_password: str | None = PlaintextPasswordOptionalField
+
+
+class UserSession(SQLModel, table=True):
+    """Server-side session for opaque access tokens.
+
+    Only a SHA-256 digest of the token is stored, so a leaked table cannot be replayed.
+
+    Attributes:
+        token_hash: SHA-256 digest of the opaque access token.
+        user_id: The ID of the user owning the session.
+        iat: Issued at: UNIX timestamp.
+        exp: Expiration: UNIX timestamp.
+    """
+
+    __tablename__ = "session"
+
+    token_hash: bytes = Field(sa_column=Column(BYTEA, primary_key=True, nullable=False))
+    user_id: UUID = Field(
+        sa_column=Column(
+            PG_UUID, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True
+        )
+    )
+    iat: int
+    exp: int = Field(index=True)  # Indexed for purging expired sessions
@@ -0,0 +1,200 @@
+"""On-demand profiling.
+
+Two tools for finding where request time goes (bcrypt, asyncpg, pydantic, `jwt_pydantic`, ...):
+
+- Per-request profiles: if `settings.profile_requests` is set, or a request carries a valid
+  `X-Profile-Signature` header, the request is run under `cProfile` and the stats are written to
+  `settings.profile_dir` (view with e.g. `snakeviz` or `python -m pstats`).  The file name is
+  returned in the `X-Profile-Id` response header.
+- `GET /admin/profile`: samples the stacks of the live worker's event loop thread for a number of
+  seconds and returns them in folded format, for `flamegraph.pl` or speedscope.
+
+The middleware is only installed if `settings.profile_secret_key` or `settings.profile_requests`
+is set, and the endpoint only if `settings.profile_secret_key` is set, so there is no overhead
+when profiling is disabled.  A signature is `<unix timestamp>:<nonce>:<hex HMAC-SHA256>`, where
+the HMAC of `"<unix timestamp>:<nonce>:<method>:<path>"` is keyed with
+`settings.profile_secret_key`; create one with `sign_profile_request()`.  A signature is valid
+for `SIGNATURE_MAX_AGE` seconds and can be used only once per worker.  At most
+`settings.profile_max_files` profiles are kept; older ones are deleted.
+"""
+
+import asyncio
+import cProfile
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+from collections import Counter
+from time import sleep, time
+from typing import Annotated
+from uuid import uuid4
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from dt_demo_gcp.auth.config import settings
+
+SIGNATURE_HEADER = "X-Profile-Signature"
+SIGNATURE_MAX_AGE = 300  # seconds
+MAX_SAMPLE_SECONDS = 60.0
+
+
+# Nonces of signatures already used -> UNIX timestamp of the signature
+_used_nonces: dict[str, int] = {}
+
+
+def _signature(timestamp: str, nonce: str, method: str, path: str) -> str:
+    key = settings.profile_secret_key.encode("utf-8")
+    message = f"{timestamp}:{nonce}:{method.upper()}:{path}".encode("utf-8")
+    return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+
+def sign_profile_request(method: str, path: str) -> str:
+    """Return a single-use `X-Profile-Signature` header value for a `method` request to `path`."""
+    timestamp = str(int(time()))
+    nonce = secrets.token_hex(16)
+    return f"{timestamp}:{nonce}:{_signature(timestamp, nonce, method, path)}"
+
+
+def verify_profile_signature(value: str | None, method: str, path: str) -> bool:
+    """Check a `X-Profile-Signature` header value for a `method` request to `path`.
+
+    A valid signature is consumed, so that replaying it fails.
+    """
+    if not value or settings.profile_secret_key is None:
+        return False
+    timestamp, _, rest = value.partition(":")
+    nonce, _, signature = rest.partition(":")
+    now = time()
+    if not timestamp.isdigit() or abs(now - int(timestamp)) > SIGNATURE_MAX_AGE:
+        return False
+    if not hmac.compare_digest(signature, _signature(timestamp, nonce, method, path)):
+        return False
+
+    # Forget nonces old enough that their signatures have expired anyway
+    for old in [n for n, t in _used_nonces.items() if now - t > SIGNATURE_MAX_AGE]:
+        del _used_nonces[old]
+    if nonce in _used_nonces:
+        return False
+    _used_nonces[nonce] = int(timestamp)
+    return True
+
+
+def _save_profile(profiler: cProfile.Profile, profile_id: str):
+    """Write a profile to `settings.profile_dir` and delete the oldest beyond the limit."""
+    os.makedirs(settings.profile_dir, exist_ok=True)
+    profiler.dump_stats(os.path.join(settings.profile_dir, f"{profile_id}.prof"))
+    _rotate_profiles()
+
+
+def _rotate_profiles():
+    """Delete the oldest profiles in `settings.profile_dir` beyond `settings.profile_max_files`."""
+    with os.scandir(settings.profile_dir) as entries:
+        profiles = sorted(
+            (e for e in entries if e.name.endswith(".prof")), key=lambda e: e.stat().st_mtime
+        )
+    for entry in profiles[: max(len(profiles) - settings.profile_max_files, 0)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+class ProfilingMiddleware:
+    """ASGI middleware writing a `cProfile` profile of selected requests to `settings.profile_dir`.
+
+    Only one request is profiled at a time, as Python allows a single active profiler; requests
+    arriving while another is being profiled are served without profiling.  Since the profiler
+    covers the event loop thread, other requests interleaved with the profiled one also appear.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Create the middleware."""
+        self.app = app
+        self.lock = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Run the request under `cProfile` if requested, otherwise pass it through."""
+        if scope["type"] != "http" or self.lock.locked():
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"].removeprefix(scope.get("root_path", ""))
+        # Admin endpoints verify (and consume) their own signatures
+        if path.startswith(router.prefix + "/") or (
+            not settings.profile_requests
+            and not verify_profile_signature(
+                Headers(scope=scope).get(SIGNATURE_HEADER), scope["method"], path
+            )
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = path.strip("/").replace("/", "_") or "root"
+        profile_id = f"{int(time())}-{endpoint}-{uuid4().hex[:8]}"
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append(
+                    (b"x-profile-id", profile_id.encode("latin-1"))
+                )
+            await send(message)
+
+        async with self.lock:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                profiler.disable()
+                # Blocking file I/O; keep it off the event loop
+                await asyncio.to_thread(_save_profile, profiler, profile_id)
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float) -> str:
+    """Sample the stack of a thread and return the samples in folded format.
+
+    Each output line is `frame;frame;...;frame count`, outermost frame first.
+    """
+    counts: Counter[str] = Counter()
+    deadline = time() + seconds
+    while time() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if stack:
+            counts[";".join(reversed(stack))] += 1
+        sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.items())
+
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get(
+    "/profile",
+    summary="Sampling profile",
+    response_class=PlainTextResponse,
+    description=f"""\
+Sample the stacks of this worker's event loop for `seconds` seconds (at most
+{MAX_SAMPLE_SECONDS:g}) and return them in folded format, for `flamegraph.pl` or speedscope.
+
+Requires a valid, single-use `{SIGNATURE_HEADER}` header for `GET /admin/profile`.
+""",
+)
+async def sampling_profile(
+    x_profile_signature: Annotated[str | None, Header()] = None,
+    seconds: Annotated[float, Query(gt=0, le=MAX_SAMPLE_SECONDS)] = 10.0,
+    interval: Annotated[float, Query(ge=0.001, le=1.0)] = 0.005,
+) -> str:
+    """Return a time-boxed sampling profile of the live worker, or raise 403 Forbidden."""
+    if not verify_profile_signature(x_profile_signature, "GET", "/admin/profile"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid signature")
+    # Sample from a separate thread, so that the event loop keeps serving requests meanwhile
+    return await asyncio.to_thread(sample_stacks, threading.get_ident(), seconds, interval)
@@ -0,0 +1,99 @@
+"""Opaque session tokens.
+
+An alternative to JWTs for internal deployments (`TOKEN_MODE=opaque`).  The access token is a
+random 128-bit handle; the session it refers to is kept in an in-process table, backed by the
+"session" table in the auth database.  Validation is a hash lookup rather than a signature check,
+and a session can be revoked by deleting it from the database.  Other workers may keep accepting
+a revoked session for up to `settings.session_cache_ttl` seconds (0 disables the in-process table
+for strict revocation).
+
+Expired sessions are deleted when a lookup finds them, and all expired rows are purged at most
+once every `settings.session_purge_interval` seconds when a new session is created.
+"""
+
+import hashlib
+import secrets
+from time import monotonic, time
+from uuid import UUID
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from dt_demo_gcp.auth.config import settings
+
+from dt_demo_gcp.auth.models import UserSession
+
+# In-process session table: token digest -> (session, monotonic time of last database check)
+_sessions: dict[bytes, tuple[UserSession, float]] = {}
+# `time.monotonic()` value of the last purge of expired sessions from the database
+_purge_state = {"last": float("-inf")}
+
+
+def _digest(token: str) -> bytes:
+    """Return the digest under which the session for `token` is stored."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _cache(key: bytes, record: UserSession):
+    """Add a session to the in-process table, evicting the least recently cached if it is full."""
+    # Re-insert, so that the dict's insertion order is the order of last refresh
+    if _sessions.pop(key, None) is None and len(_sessions) >= settings.session_cache_size:
+        del _sessions[next(iter(_sessions))]
+    _sessions[key] = (record, monotonic())
+
+
+async def _purge_expired(session: AsyncSession, now: int):
+    """Delete expired sessions from the database, at most once per purge interval."""
+    if monotonic() - _purge_state["last"] < settings.session_purge_interval:
+        return
+    _purge_state["last"] = monotonic()
+    await session.execute(delete(UserSession).where(UserSession.exp <= now))
+
+
+async def new_session_token(session: AsyncSession, user_id: UUID, iat: int, exp: int) -> str:
+    """Create a session for the user and return its opaque access token."""
+    token = secrets.token_urlsafe(16)  # 128 bits
+    record = UserSession(token_hash=_digest(token), user_id=user_id, iat=iat, exp=exp)
+    session.add(record)
+    await _purge_expired(session, iat)
+    await session.commit()
+    _cache(record.token_hash, record)
+    return token
+
+
+async def lookup_session_token(session: AsyncSession, token: str) -> UserSession:
+    """Look up the session for an opaque token.
+
+    The database is only queried if the session is not in the in-process table, or its entry is
+    older than `settings.session_cache_ttl`.  As with `decode_jwt_token()`, the error string, if
+    any, will be included in the HTTP response as an `error` fragment in the redirect URL.
+    """
+    key = _digest(token)
+    entry = _sessions.get(key)
+    if entry is not None and monotonic() - entry[1] < settings.session_cache_ttl:
+        record = entry[0]
+    else:
+        record = (
+            await session.execute(select(UserSession).where(UserSession.token_hash == key))
+        ).scalar_one_or_none()
+        if record is None:
+            _sessions.pop(key, None)
+            raise ValueError("invalid_token")
+        _cache(key, record)
+
+    if record.exp <= time():
+        _sessions.pop(key, None)
+        await session.execute(delete(UserSession).where(UserSession.token_hash == key))
+        await session.commit()
+        raise ValueError("expired_token")
+
+    return record
+
+
+async def revoke_session_token(session: AsyncSession, token: str):
+    """Revoke the session for an opaque token.  Revoking an unknown token is not an error."""
+    key = _digest(token)
+    _sessions.pop(key, None)
+    await session.execute(delete(UserSession).where(UserSession.token_hash == key))
+    await session.commit()
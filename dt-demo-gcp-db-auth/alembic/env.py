@@ -22,7 +22,7 @@ class Settings(BaseSettings):
     )
 
 
-from dt_demo_gcp.auth.models import User  # noqa: E402,F401
+from dt_demo_gcp.auth.models import User, UserSession  # noqa: E402,F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
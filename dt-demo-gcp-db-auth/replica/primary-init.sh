@@ -0,0 +1,15 @@
+#!/bin/sh
+# Allow streaming replication connections to the primary (auth-postgres), for the
+# auth-postgres-replica stand-in in compose.yml.
+#
+# Runs automatically from /docker-entrypoint-initdb.d/ when the primary's data volume is created.
+# For an existing volume, run it once by hand:
+#   docker compose exec auth-postgres sh /docker-entrypoint-initdb.d/10-replication.sh
+
+set -eu
+
+if ! grep -q "^host replication" "$PGDATA/pg_hba.conf"; then
+    echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
+    echo "✅ Replication connections allowed in pg_hba.conf"
+fi
+psql -v ON_ERROR_STOP=1 -U "${POSTGRES_USER:-postgres}" -c "SELECT pg_reload_conf();" > /dev/null
@@ -0,0 +1,21 @@
+#!/bin/sh
+# Entrypoint for auth-postgres-replica: a streaming read replica of auth-postgres, for testing
+# read-replica routing locally.  On first start, clone the primary with pg_basebackup (-R writes
+# standby.signal and primary_conninfo); then start Postgres as a hot standby.
+
+set -eu
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    echo "🛠️ Cloning primary auth-postgres into $PGDATA..."
+    until PGPASSWORD="$POSTGRES_PASSWORD" pg_basebackup \
+            -h auth-postgres -p 5432 -U postgres -D "$PGDATA" -R -X stream; do
+        echo "⏳ Waiting for primary..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+    chown -R postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    echo "✅ Replica initialised."
+fi
+
+exec docker-entrypoint.sh postgres
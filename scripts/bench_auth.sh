@@ -0,0 +1,63 @@
+#!/usr/bin/env bash
+
+# Run the dt-demo-gcp-auth microbenchmarks (no database or network required).
+#
+# Usage:
+#   git script bench_auth save       # Save the results as the new baseline
+#   git script bench_auth [PCT]      # Compare against the baseline; fail if the best minimum time of
+#                                    # any benchmark regresses by more than PCT percent (default 30)
+#
+# The suite is run BENCH_RUNS times (default 3) with warmup and the garbage collector disabled, and
+# the best minimum time of each benchmark across the runs is compared (see benchmarks/compare.py),
+# so that noise from other processes does not fail the gate on an unchanged tree.
+#
+# Baselines are machine-specific, so they are stored locally in dt-demo-gcp-auth/.benchmarks/
+# (ignored by Git).  Save a baseline before a dependency bump, then compare after it.
+
+set -euo pipefail
+
+echo "Changing directory to the dt-demo-gcp-auth project..."
+cd "$(git rev-parse --show-toplevel)/dt-demo-gcp-auth"
+
+# Check if uv is installed
+if ! command -v uv &> /dev/null; then
+    echo "❌ uv could not be found, please run 'init.sh' to set up the Git project environment."
+    exit 1
+fi
+
+runs=${BENCH_RUNS:-3}
+baseline_dir=.benchmarks/baseline
+
+# Run the suite $runs times, writing the JSON results into the directory $1
+run_benchmarks() {
+    rm -rf "$1"
+    mkdir -p "$1"
+    for i in $(seq "$runs"); do
+        echo "--- Run ${i}/${runs} ---"
+        uv run --package dt-demo-gcp-auth pytest benchmarks -q \
+            --benchmark-warmup=on \
+            --benchmark-disable-gc \
+            --benchmark-min-rounds=50 \
+            --benchmark-json="$1/run-${i}.json"
+    done
+}
+
+if [ "${1:-}" == "save" ]; then
+    echo
+    echo "=== Saving auth microbenchmark baseline ==="
+    run_benchmarks "$baseline_dir"
+    echo "✅ Baseline saved."
+    exit 0
+fi
+
+threshold=${1:-30}
+if ! ls "$baseline_dir"/*.json &> /dev/null; then
+    echo "❌ No baseline found.  Run 'git script bench_auth save' first."
+    exit 1
+fi
+
+echo
+echo "=== Comparing auth microbenchmarks against baseline (threshold: ${threshold}%) ==="
+run_benchmarks .benchmarks/current
+uv run --package dt-demo-gcp-auth python benchmarks/compare.py \
+    "$baseline_dir" .benchmarks/current --threshold "$threshold"
@@ -1,38 +1,126 @@
 """UV script discovery.
 
 Recursively find all UV scripts in the workspace.
+
+Workspace members may be given as glob patterns (as with `uv` itself), and `exclude` patterns
+are honoured.  Parsed `[project.scripts]` tables are cached in `.cache/uv_scripts.json`, keyed
+on each manifest's modification time and size, so that repeat invocations only re-parse the
+`pyproject.toml` files that have changed.  Manifests are parsed serially: `tomllib` holds the
+GIL, so threads would not speed up parsing, and a cache hit is a single `stat()` call.
 """
 
+import glob
 import json
+import os
 import sys
+import tomllib
+
+CACHE_PATH = ".cache/uv_scripts.json"
+CACHE_VERSION = 1
+
+
+def stat_key(path: str) -> list[int]:
+    """Return the cache key for a manifest: its modification time (ns) and size."""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_cache() -> dict[str, dict]:
+    """Load the manifest cache, or return an empty cache if missing or invalid."""
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("manifests", {})
+
+
+def save_cache(manifests: dict[str, dict]):
+    """Write the manifest cache.  Failure to write the cache is not an error."""
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        tmp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "manifests": manifests}, f)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError:
+        pass
+
 
-import toml
+def parse_manifest(path: str) -> dict:
+    """Parse a `pyproject.toml` file and return the fields needed for script discovery."""
+    with open(path, "rb") as f:
+        config = tomllib.load(f)
+    workspace = config.get("tool", {}).get("uv", {}).get("workspace", {})
+    return {
+        "scripts": config.get("project", {}).get("scripts", {}),
+        "members": workspace.get("members", []),
+        "exclude": workspace.get("exclude", []),
+    }
+
+
+def expand_members(patterns: list[str], exclude: list[str]) -> list[str]:
+    """Expand workspace member glob patterns, preserving the order given in the configuration.
+
+    Literal (non-glob) members are always kept, so that a missing `pyproject.toml` is reported.
+    Glob matches are kept only if they are directories containing a `pyproject.toml` file.
+    """
+    excluded = {os.path.normpath(p) for pattern in exclude for p in glob.glob(pattern)}
+    members: list[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = [
+                m
+                for m in sorted(glob.glob(pattern))
+                if os.path.isfile(os.path.join(m, "pyproject.toml"))
+            ]
+        else:
+            matches = [pattern]
+        for match in matches:
+            if os.path.normpath(match) not in excluded and match not in members:
+                members.append(match)
+    return members
+
+
+def load_manifest(path: str, cache: dict[str, dict]) -> dict:
+    """Return the cache entry for the manifest at `path`, re-parsing it only if it has changed.
+
+    Raises `FileNotFoundError` if the manifest does not exist.
+    """
+    key = stat_key(path)
+    entry = cache.get(path)
+    if entry is not None and entry.get("key") == key:
+        return entry
+    return {"key": key, "manifest": parse_manifest(path)}
+
+
+cache = load_cache()
+new_cache: dict[str, dict] = {}
 
 # Load the main configuration file
 try:
-    config = toml.load("pyproject.toml")
+    new_cache["pyproject.toml"] = load_manifest("pyproject.toml", cache)
 except FileNotFoundError:
     print("❌ Configuration file not found.")
     sys.exit(1)
-workspace_members = config.get("tool", {}).get("uv", {}).get("workspace", {}).get("members", [])
+config = new_cache["pyproject.toml"]["manifest"]
+workspace_members = expand_members(config["members"], config["exclude"])
 
-scripts = {}
-
-if "project" in config and "scripts" in config["project"]:
-    scripts["<global>"] = config["project"]["scripts"]
-else:
-    scripts["<global>"] = {}
+scripts = {"<global>": config["scripts"]}
 
+# Cache hits only cost a `stat()` call; parsing a few small manifests serially is fast enough
 for member in workspace_members:
-    member_path = f"{member}/pyproject.toml"
+    path = f"{member}/pyproject.toml"
     try:
-        member_config = toml.load(member_path)
+        new_cache[path] = load_manifest(path, cache)
     except FileNotFoundError:
         print(f"❌ Configuration file not found for {member}.")
         sys.exit(1)
-    if "project" in member_config and "scripts" in member_config["project"]:
-        scripts[member] = member_config["project"]["scripts"]
-    else:
-        scripts[member] = {}
+    scripts[member] = new_cache[path]["manifest"]["scripts"]
+
+if new_cache != cache:
+    save_cache(new_cache)
 
 print(json.dumps(scripts, indent=4))